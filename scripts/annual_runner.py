@@ -8,7 +8,7 @@ Yilian 年报脚本（年度/全量）
     results/<scope>_annual_summary.csv            # 按项目汇总
     results/<scope>_annual_by_branch.csv          # 按项目-分支汇总
     results/<scope>_annual_monthly.csv            # 月度分布（用于审视全年结构）
-    results/<scope>_annual_report.xlsx            # 上述三张表合并成一个 Excel
+    results/<scope>_annual_report.xlsx            # 上述三张表合并成一个 Excel（EMIT_XLSX=0 时不生成，并删除旧文件）
 
 - 可选：若设置 FEISHU_WEBHOOK_URL，则发送一个简要卡片通知（不强依赖签名）
 - 可选：若存在 GITHUB_TOKEN，则自动 git 提交产物并 push（用于 Actions）
@@ -17,30 +17,59 @@ Yilian 年报脚本（年度/全量）
 - FEISHU_WEBHOOK_URL    选填，飞书“自定义机器人”Webhook
 - FEISHU_WEBHOOK_SECRET 选填，若机器人启用签名校验
 - GITHUB_TOKEN          Actions 会默认注入；本地运行时可不设
+- EMIT_XLSX             选填，默认 1；设为 0/false/no/off 则跳过 Excel（最耗时的产物）并删除旧的 Excel，只输出三张 CSV
 """
 
 from __future__ import annotations
 import argparse
 import base64
-import csv
+import codecs
 import datetime as dt
 import hashlib
 import hmac
 import json
+import mmap
 import os
 import re
 import subprocess
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+# Copy-on-Write：切片即视图，只有真正写入时才复制。pandas 3 起已是唯一行为（该选项被弃用），2.x 需显式打开
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+try:  # 可选：pyarrow 的多线程 CSV 解析器，明显快于默认 C 引擎
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:  # 可选：xlsxwriter 支持 constant_memory 逐行落盘，比 openpyxl 快且省内存
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
 # -----------------------
 # 基本配置
 # -----------------------
 ENCODINGS_TO_TRY = ["utf-8-sig", "utf-8", "gbk", "gb2312"]
+SNIFF_BYTES = 64 * 1024  # 编码探测只读文件头部
+PARALLEL_MIN_FILES = 4   # CSV 少于该数量时串行读取
+
+# 解析缓存：每个 CSV 统一后的结果按文件内容哈希存为 parquet，内容未变时直接读缓存（需要 pyarrow）。
+# 按内容而非 mtime 做键：Actions 每次 checkout 的 mtime 都是新的
+CACHE_DIR = Path(".cache") / "parquet"
+CACHE_VERSION = "4"  # 解析/统一逻辑有变化时递增，使旧缓存失效
+
 EXCLUDE_DIRS = {"results", ".github", ".git", ".venv", "venv", "__pycache__", ".idea", ".vscode"}
 
 # 原始表头可能含换行，这里做标准化后的目标列名
@@ -53,10 +82,20 @@ CANON_COLS = {
     "申请时间": ["申请时间", "申请\n时间", "申請時間", "时间", "时间戳"]
 }
 
+WS_RE = re.compile(r"\s+")
+
+# pick_date_series 的兜底：表头像日期的列
+DATE_LIKE_RE = re.compile(r"时间|date|日期|time", re.I)
+
+# (格式, 整串匹配该格式的正则)：兜底解析时按正则把每个值只分给一个格式
 DATE_FORMATS_HINT = [
-    "%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d",
-    "%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S",
-    "%Y年%m月%d日", "%Y年%m月%d日 %H:%M:%S"
+    ("%Y-%m-%d", re.compile(r"\d{4}-\d{1,2}-\d{1,2}")),
+    ("%Y/%m/%d", re.compile(r"\d{4}/\d{1,2}/\d{1,2}")),
+    ("%Y.%m.%d", re.compile(r"\d{4}\.\d{1,2}\.\d{1,2}")),
+    ("%Y-%m-%d %H:%M:%S", re.compile(r"\d{4}-\d{1,2}-\d{1,2} \d{1,2}:\d{1,2}:\d{1,2}")),
+    ("%Y/%m/%d %H:%M:%S", re.compile(r"\d{4}/\d{1,2}/\d{1,2} \d{1,2}:\d{1,2}:\d{1,2}")),
+    ("%Y年%m月%d日", re.compile(r"\d{4}年\d{1,2}月\d{1,2}日")),
+    ("%Y年%m月%d日 %H:%M:%S", re.compile(r"\d{4}年\d{1,2}月\d{1,2}日 \d{1,2}:\d{1,2}:\d{1,2}")),
 ]
 
 
@@ -71,29 +110,89 @@ def find_repo_root(start: Path) -> Path:
     return start.resolve()
 
 
+def clean_header(c) -> str:
+    # 去除表头中的换行/空白（\s 已包含 \n、\r）
+    return WS_RE.sub("", str(c))
+
+
+# 别名 -> 标准名 的扁平映射（按清洗后的写法），每列一次字典查找即可对齐；
+# 读 CSV 时也只解析这些列 + 日期兜底列
+ALIAS_TO_CANON = {clean_header(a): std for std, aliases in CANON_COLS.items() for a in aliases}
+
+
+def is_wanted_column(c) -> bool:
+    nc = clean_header(c)
+    return nc in ALIAS_TO_CANON or DATE_LIKE_RE.search(nc) is not None
+
+
 def normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
-    # 去除表头中的换行/空白
-    new_cols = []
-    for c in df.columns:
-        nc = str(c).replace("\n", "").replace("\r", "")
-        nc = re.sub(r"\s+", "", nc)
-        new_cols.append(nc)
-    df.columns = new_cols
+    df.columns = [clean_header(c) for c in df.columns]
 
     # 字段对齐：把各种别名映射为标准名
-    mapping = {}
-    for std, aliases in CANON_COLS.items():
-        for col in df.columns:
-            if col in aliases:
-                mapping[col] = std
+    mapping = {c: ALIAS_TO_CANON[c] for c in df.columns if c in ALIAS_TO_CANON}
     df = df.rename(columns=mapping)
     return df
 
 
-def read_csv_any(path: Path) -> Optional[pd.DataFrame]:
+def sniff_encoding(path: Path) -> Optional[str]:
+    # 只读一次文件头：BOM -> 候选编码严格解码 -> charset_normalizer（若已安装）
+    with open(path, "rb") as f:
+        sample = f.read(SNIFF_BYTES)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    # 样本可能截断在多字节字符中间，用增量解码器容忍结尾的半个字符
+    final = len(sample) < SNIFF_BYTES
     for enc in ENCODINGS_TO_TRY:
+        if enc == "utf-8-sig":
+            continue
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=final)
+            return enc
+        except UnicodeDecodeError:
+            continue
+
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return None
+    best = from_bytes(sample).best()
+    return best.encoding if best is not None else None
+
+
+def read_header(path: Path, encoding: str) -> List[str]:
+    # nrows=0 只解析表头：跳过开头空行、重名列改名为 “x.1” 等行为与正式解析一致
+    return list(pd.read_csv(path, encoding=encoding, nrows=0).columns)
+
+
+def parse_csv(path: Path, encoding: str, usecols: List[str]) -> pd.DataFrame:
+    # usecols 让解析器跳过无关列；dtype=str 省掉类型推断（日期后面统一解析）
+    if HAS_PYARROW:
+        try:
+            df = pd.read_csv(path, encoding=encoding, usecols=usecols,
+                             dtype=pd.ArrowDtype(pa.string()), engine="pyarrow")
+            # 与 C 引擎保持一致：object 列、空值为 NaN。
+            # 不能直接 dtype=str：pandas 2.x 的 pyarrow 引擎会把空单元格变成字符串 "None"；
+            # dtype=object 又会让 pyarrow 自行推断类型（日期列变成 datetime.date）
+            return df.astype(object).where(df.notna(), np.nan)
+        except Exception:
+            pass  # 表头重名（pyarrow 不认 “x.1” 这样的改名）等情况，回退到 C 引擎
+    return pd.read_csv(path, encoding=encoding, usecols=usecols, dtype=str)
+
+
+def read_csv_any(path: Path) -> Optional[pd.DataFrame]:
+    # 先用探测到的编码解析一次；失败时再按原顺序逐个尝试
+    enc = sniff_encoding(path)
+    candidates = ENCODINGS_TO_TRY if enc is None else [enc] + [e for e in ENCODINGS_TO_TRY if e != enc]
+    for enc in candidates:
         try:
-            df = pd.read_csv(path, encoding=enc)
+            usecols = [c for c in read_header(path, enc) if is_wanted_column(c)]
+            if not usecols:
+                # 没有可用列（如无表头的导出），不必解析正文
+                return pd.DataFrame()
+            df = parse_csv(path, enc, usecols)
             df = normalize_headers(df)
             return df
         except Exception:
@@ -105,44 +204,81 @@ def pick_date_series(df: pd.DataFrame) -> Optional[pd.Series]:
     if "申请时间" in df.columns:
         return df["申请时间"]
     # 兜底：尝试寻找最像日期的列
-    date_like = [c for c in df.columns if re.search(r"时间|date|日期|time", c, re.I)]
+    date_like = [c for c in df.columns if DATE_LIKE_RE.search(c)]
     if date_like:
         return df[date_like[0]]
     return None
 
 
 def to_datetime_safe(series: pd.Series) -> pd.Series:
-    # 先试 pandas 自动解析
-    s = pd.to_datetime(series, errors="coerce", utc=False, infer_datetime_format=True)
+    # 只对“原本非空却还没解析出来”的值继续尝试
+    def pending(s: pd.Series) -> pd.Series:
+        return s.isna() & series.notna()
 
-    # 再试手动常见格式
-    mask = s.isna()
+    # cache=True：重复的时间字符串只解析一次（同一分钟内的多条申请很常见）
+    # 1) ISO 8601（最常见）：pandas 内置 C 解析器，带/不带秒、纯日期混在一起也能一次解析完
+    s = pd.to_datetime(series, format="ISO8601", errors="coerce", utc=False, cache=True)
+
+    # 2) 其余交给 pandas 自动解析（按首个值推断格式，如 2025/1/4 15:02）
+    mask = pending(s)
+    if mask.any():
+        s.loc[mask] = pd.to_datetime(series[mask], errors="coerce", utc=False, cache=True)
+
+    # 3) 再试手动常见格式：每个值只按匹配到的那一个格式解析一次
+    mask = pending(s)
     if mask.any():
         raw = series[mask].astype(str)
-        parsed = pd.Series([pd.NaT] * raw.shape[0], index=raw.index)
-        for fmt in DATE_FORMATS_HINT:
-            try:
-                parsed2 = pd.to_datetime(raw, format=fmt, errors="coerce")
-                parsed = parsed.fillna(parsed2)
-            except Exception:
-                pass
-        s[mask] = parsed
+        for fmt, pat in DATE_FORMATS_HINT:
+            hit = raw.str.fullmatch(pat)
+            if hit.any():
+                parsed = pd.to_datetime(raw[hit], format=fmt, errors="coerce", cache=True)
+                s.loc[parsed.index] = parsed
     return s
 
 
 def collect_csvs(repo_root: Path) -> List[Path]:
+    # 显式栈 + os.scandir：在下探前就剪掉排除目录，避免对 .git/、results/ 等做无用的 stat
     csvs: List[Path] = []
-    for p in repo_root.rglob("*.csv"):
-        parts = set(p.relative_to(repo_root).parts)
-        if parts & EXCLUDE_DIRS:
-            continue
-        # 排除明显的产物/历史/缓存
-        if any(seg.startswith(".") for seg in parts):
-            continue
-        csvs.append(p)
+    stack = [str(repo_root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                name = entry.name
+                # 排除明显的产物/历史/缓存
+                if name in EXCLUDE_DIRS or name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif name.endswith((".csv", ".CSV")):
+                    csvs.append(Path(entry.path))
+    csvs.sort()
     return csvs
 
 
+def file_digest(path: Path) -> str:
+    # mmap 交给 blake2b 直接哈希，不在 Python 侧复制文件内容
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.blake2b(b"", digest_size=16).hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return hashlib.blake2b(m, digest_size=16).hexdigest()
+
+
+def unique_by_content(paths: List[Path]) -> List[Tuple[Path, str]]:
+    # 逐字节相同的 CSV（如重复提交的快照）只解析一份，反正合并后也会被去重；
+    # 返回 (路径, 内容哈希)，哈希同时作为解析缓存的键
+    seen: Dict[str, Path] = {}
+    unique: List[Tuple[Path, str]] = []
+    for p in paths:
+        d = file_digest(p)
+        if d in seen:
+            print(f"[Skip] 与 {seen[d]} 内容相同: {p}")
+            continue
+        seen[d] = p
+        unique.append((p, d))
+    return unique
+
+
 def unify_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     # 需要的列：项目名、分支、申请时间
     # 若缺列，则补空列以便后续 groupby 不报错
@@ -158,10 +294,79 @@ def unify_dataframe(df: pd.DataFrame) -> pd.DataFrame:
 
     # 仅保留三列 + 原始全量（以备后续扩展）
     keep = [c for c in df.columns if c in {"项目名", "基于哪条manifest分支", "申请时间"}]
-    df = df[keep].copy()
+    return df[keep]
+
+
+def cache_file_for(cache_dir: Path, digest: str) -> Path:
+    return cache_dir / f"{CACHE_VERSION}-{digest}.parquet"
+
+
+def read_cache(cache_file: Path) -> Optional[pd.DataFrame]:
+    import pyarrow.parquet as pq
+    try:
+        return pq.read_table(cache_file).to_pandas()
+    except Exception:
+        # 不存在或损坏都按未命中处理
+        return None
+
+
+def write_cache(cache_file: Path, df: pd.DataFrame) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    tmp = cache_file.with_suffix(".tmp")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="zstd")
+    os.replace(tmp, cache_file)
+
+
+def prune_cache(cache_dir: Path, digests: List[str]) -> None:
+    # 只保留本次输入对应的缓存，避免历史版本/已删除文件的缓存无限增长
+    keep = {cache_file_for(cache_dir, d).name for d in digests}
+    for f in cache_dir.glob("*.parquet"):
+        if f.name not in keep:
+            f.unlink()
+
+
+def load_csv(path: Path, digest: Optional[str] = None,
+             cache_dir: Optional[Path] = None) -> Optional[pd.DataFrame]:
+    # 单文件：读取 + 统一列；无法读取或空文件返回 None
+    use_cache = cache_dir is not None and digest is not None and HAS_PYARROW
+    if use_cache:
+        cache_file = cache_file_for(cache_dir, digest)
+        df = read_cache(cache_file)
+        if df is not None:
+            return df
+
+    df = read_csv_any(path)
+    if df is None or df.empty:
+        return None
+    df = unify_dataframe(df)
+
+    if use_cache:
+        try:
+            write_cache(cache_file, df)
+        except Exception as e:
+            print(f"[Cache] 写入失败（忽略）: {path}: {e}")
     return df
 
 
+def load_all(csvs: List[Tuple[Path, str]],
+             cache_dir: Optional[Path] = None) -> List[Tuple[Path, Optional[pd.DataFrame]]]:
+    # csvs: unique_by_content 返回的 (路径, 内容哈希)
+    csv_paths = [p for p, _ in csvs]
+    digests = [d for _, d in csvs]
+    load = partial(load_csv, cache_dir=cache_dir)
+    if len(csvs) < PARALLEL_MIN_FILES:
+        # 文件很少时，起进程池的开销比并行省下的时间还多
+        return [(p, load(p, d)) for p, d in csvs]
+
+    # 表头处理、日期解析等大部分时间持有 GIL，用多进程才能真正用满多核；
+    # 每个文件只回传统一后的三列小表，序列化开销很小
+    workers = min(len(csv_paths), os.cpu_count() or 1)
+    chunksize = max(1, len(csv_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(zip(csv_paths, ex.map(load, csv_paths, digests, chunksize=chunksize)))
+
+
 def deduplicate(df: pd.DataFrame) -> pd.DataFrame:
     # 去重依据：项目名-分支-时间 三元
     return df.drop_duplicates(subset=["项目名", "基于哪条manifest分支", "申请时间"])
@@ -173,45 +378,65 @@ def filter_scope(df: pd.DataFrame, scope: str) -> Tuple[pd.DataFrame, str]:
     返回 (过滤后的 df, 实际用于文件名的 scope_str)
     """
     if scope.upper() == "ALL":
-        return df.copy(), "all"
+        return df, "all"
     try:
         year = int(scope)
     except Exception:
         # 无法解析年份就当 ALL
-        return df.copy(), "all"
-    mask = df["申请时间"].dt.year == year
-    return df[mask].copy(), str(year)
+        return df, "all"
+    try:
+        start, end = pd.Timestamp(year, 1, 1), pd.Timestamp(year + 1, 1, 1)
+    except ValueError:
+        # 超出 Timestamp 可表示范围的年份不可能有数据
+        return df.iloc[0:0], str(year)
+    # 半开区间 [当年 1 月 1 日, 次年 1 月 1 日)：两次 int64 比较，不必逐行提取 .dt.year，
+    # 也没有 “年末 - 1 秒” 的边界问题
+    ts = df["申请时间"]
+    mask = (ts >= start) & (ts < end)
+    return df[mask], str(year)
 
 
 def group_summaries(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    # 1) 按项目汇总
+    # 1) 按项目-分支汇总（先算：分组结果顺带给出每个项目最常用的分支）
+    counts = (
+        df.groupby(["项目名", "基于哪条manifest分支"], dropna=False, observed=True)
+        .agg(
+            次数=("申请时间", "count"),
+            首次时间=("申请时间", "min"),
+            最近时间=("申请时间", "max"),
+        )
+        .reset_index()
+    )
+    by_proj_branch = counts.sort_values(["次数", "最近时间"], ascending=[False, False], ignore_index=True)
+
+    # 每个项目取次数最多的非空分支，替代逐组执行的 value_counts lambda。
+    # 次数并列时取最早用过的分支（按时间导出的数据即原 value_counts 的“先出现者”），再按分支名
+    top_branch = (
+        counts.dropna(subset=["基于哪条manifest分支"])
+        .sort_values(["次数", "首次时间", "基于哪条manifest分支"], ascending=[False, True, True])
+        .drop_duplicates("项目名")
+        .set_index("项目名")["基于哪条manifest分支"]
+        .rename("最常用分支")
+    )
+
+    # 2) 按项目汇总
     by_proj = (
-        df.groupby("项目名", dropna=False)
+        df.groupby("项目名", dropna=False, observed=True)
         .agg(
             申请次数=("申请时间", "count"),
             首次申请时间=("申请时间", "min"),
             最近申请时间=("申请时间", "max"),
             分支种类数=("基于哪条manifest分支", "nunique"),
-            最常用分支=("基于哪条manifest分支", lambda s: s.value_counts(dropna=True).idxmax() if s.dropna().shape[0] else pd.NA),
         )
+        .join(top_branch)
         .sort_values(["申请次数", "最近申请时间"], ascending=[False, False])
         .reset_index()
     )
 
-    # 2) 按项目-分支汇总
-    by_proj_branch = (
-        df.groupby(["项目名", "基于哪条manifest分支"], dropna=False)
-        .agg(
-            次数=("申请时间", "count"),
-            首次时间=("申请时间", "min"),
-            最近时间=("申请时间", "max"),
-        )
-        .sort_values(["次数", "最近时间"], ascending=[False, False])
-        .reset_index()
-    )
-
     # 3) 月度分布（用于看全年分布结构）
-    month_col = df["申请时间"].dt.to_period("M").astype(str)
+    # datetime64[M] + datetime_as_string 在 NumPy 里一次完成，避免 to_period 逐个生成 Period 对象
+    months = df["申请时间"].to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+    month_col = pd.Series(np.datetime_as_string(months, unit="M"), index=df.index)
     by_month = (
         df.assign(月份=month_col)
         .groupby("月份")
@@ -230,10 +455,98 @@ def ensure_results_dir(repo_root: Path) -> Path:
     return out
 
 
+def ensure_cache_dir(repo_root: Path) -> Path:
+    out = repo_root / CACHE_DIR
+    out.mkdir(parents=True, exist_ok=True)
+    return out
+
+
+def column_widths(df: pd.DataFrame, lo: int = 10, hi: int = 60) -> List[int]:
+    # 按列整体计算显示宽度（向量化，不逐单元格循环）；中文等宽字符按 2 计
+    def display_len(s: pd.Series) -> pd.Series:
+        return s.str.len() + s.str.count(r"[^\x00-\xff]")
+
+    header = display_len(pd.Series([str(c) for c in df.columns], dtype=object)).to_numpy()
+    if df.empty:
+        body = header * 0
+    else:
+        body = df.astype(str).apply(lambda s: display_len(s).max()).to_numpy()
+    return [int(w) for w in np.clip(np.maximum(header, body) + 2, lo, hi)]
+
+
+def body_rows(df: pd.DataFrame):
+    # 按行产出单元格值；缺失值（NaN/NaT/NA）写成空单元格
+    body = df.astype(object).where(df.notna(), None)
+    return body.itertuples(index=False, name=None)
+
+
+def write_xlsx_openpyxl(xlsx: Path, sheets: Dict[str, pd.DataFrame],
+                        created: Optional[dt.datetime] = None) -> None:
+    # write_only 模式逐行落盘；pandas 的 openpyxl 引擎按单元格随机写，无法用 write_only。
+    # 注意：openpyxl 保存时总把 modified 和 zip 条目时间写成当前时间，产物不会逐字节一致，
+    # 走这个回退时 git_commit_and_push 的“无变化跳过”不会生效
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    if created is not None:
+        wb.properties.created = created
+    bold = Font(bold=True)
+    thin = Side(style="thin")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    center = Alignment(horizontal="center", vertical="center")
+    for name, df in sheets.items():
+        ws = wb.create_sheet(name)
+        for i, w in enumerate(column_widths(df), start=1):
+            ws.column_dimensions[get_column_letter(i)].width = w
+        ws.freeze_panes = "A2"
+        header = []
+        for c in df.columns:
+            cell = WriteOnlyCell(ws, value=str(c))
+            cell.font, cell.border, cell.alignment = bold, border, center
+            header.append(cell)
+        ws.append(header)
+        for row in body_rows(df):
+            ws.append(row)
+    wb.save(xlsx)
+
+
+def write_xlsx(xlsx: Path, sheets: Dict[str, pd.DataFrame],
+               created: Optional[dt.datetime] = None) -> None:
+    if not HAS_XLSXWRITER:
+        write_xlsx_openpyxl(xlsx, sheets, created)
+        return
+
+    # constant_memory 要求严格按行顺序写；pandas 的 to_excel 是按列写的，所以这里自己逐行写
+    wb = xlsxwriter.Workbook(str(xlsx), {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
+    # 文档创建时间取数据中的最新申请时间（而不是运行时刻）：输入不变时产物逐字节一致，
+    # git_commit_and_push 才能识别“无变化”
+    if created is not None:
+        wb.set_properties({"created": created})
+    try:
+        header_fmt = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "vcenter"})
+        for name, df in sheets.items():
+            ws = wb.add_worksheet(name)
+            for i, w in enumerate(column_widths(df)):
+                ws.set_column(i, i, w)
+            ws.write_row(0, 0, [str(c) for c in df.columns], header_fmt)
+            for i, row in enumerate(body_rows(df), start=1):
+                ws.write_row(i, 0, row)
+            ws.freeze_panes(1, 0)
+    finally:
+        wb.close()
+
+
 def save_outputs(out_dir: Path, scope_str: str,
                  by_proj: pd.DataFrame,
                  by_proj_branch: pd.DataFrame,
-                 by_month: pd.DataFrame) -> List[Path]:
+                 by_month: pd.DataFrame,
+                 created: Optional[dt.datetime] = None) -> List[Path]:
     csv1 = out_dir / f"{scope_str}_annual_summary.csv"
     csv2 = out_dir / f"{scope_str}_annual_by_branch.csv"
     csv3 = out_dir / f"{scope_str}_annual_monthly.csv"
@@ -243,10 +556,18 @@ def save_outputs(out_dir: Path, scope_str: str,
     by_proj_branch.to_csv(csv2, index=False, encoding="utf-8-sig")
     by_month.to_csv(csv3, index=False, encoding="utf-8-sig")
 
-    with pd.ExcelWriter(xlsx, engine="openpyxl") as writer:
-        by_proj.to_excel(writer, index=False, sheet_name="按项目汇总")
-        by_proj_branch.to_excel(writer, index=False, sheet_name="按项目-分支")
-        by_month.to_excel(writer, index=False, sheet_name="月度分布")
+    emit_xlsx = os.getenv("EMIT_XLSX", "1")
+    if emit_xlsx.strip().lower() in {"0", "false", "no", "off"}:
+        # 删掉上次运行留下的 Excel，免得它和刚生成的 CSV 不一致却仍被提交
+        xlsx.unlink(missing_ok=True)
+        print(f"[Skip] EMIT_XLSX={emit_xlsx}，不生成 Excel。")
+        return [csv1, csv2, csv3]
+
+    write_xlsx(xlsx, {
+        "按项目汇总": by_proj,
+        "按项目-分支": by_proj_branch,
+        "月度分布": by_month,
+    }, created)
 
     return [csv1, csv2, csv3, xlsx]
 
@@ -254,11 +575,19 @@ def save_outputs(out_dir: Path, scope_str: str,
 # -----------------------
 # 可选：飞书通知
 # -----------------------
+# 仅对“服务端明确未处理”的情况重试（429 限流、503 不可用、连接被拒绝），避免重发导致重复卡片；
+# 500/502/504 及超时时飞书可能已经发出卡片，不重试
+FEISHU_RETRY_STATUS = {429, 503}
+FEISHU_MAX_RETRIES = 3
+FEISHU_BACKOFF = 0.5  # 秒，按 0.5/1/2 指数退避
+
+
 def feishu_sign(secret: str, timestamp: str) -> str:
     # 飞书机器人签名（若启用），签名算法版本可能有差异；此实现覆盖 v2 常见用法
+    # 飞书把 "timestamp\nsecret" 当作 HMAC 的 key、消息为空，key 随时间戳变化，无法预先缓存；
+    # 用一次性的 hmac.digest（C 实现），不再构造 HMAC 对象
     string_to_sign = f"{timestamp}\n{secret}".encode("utf-8")
-    h = hmac.new(string_to_sign, b"", digestmod=hashlib.sha256)
-    return base64.b64encode(h.digest()).decode("utf-8")
+    return base64.b64encode(hmac.digest(string_to_sign, b"", "sha256")).decode("utf-8")
 
 
 def send_feishu_card(total_rows: int, proj_cnt: int, scope_str: str, files: List[Path]) -> None:
@@ -291,17 +620,37 @@ def send_feishu_card(total_rows: int, proj_cnt: int, scope_str: str, files: List
         sign = feishu_sign(secret, ts)
         payload.update({"timestamp": ts, "sign": sign})
 
+    try:
+        # 紧凑分隔符 + 不转义中文：正文直接是 UTF-8，体积约为默认 \uXXXX 转义的一半
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        status = post_json(url, body)
+        print("[Feishu] 状态：", status)
+    except Exception as e:
+        print("[Feishu] 发送失败：", e)
+
+
+def post_json(url: str, body: bytes, timeout: float = 10) -> int:
+    import urllib.error
     import urllib.request
     req = urllib.request.Request(
         url=url,
-        data=json.dumps(payload).encode("utf-8"),
+        data=body,
         headers={"Content-Type": "application/json"}
     )
-    try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            print("[Feishu] 状态：", resp.status)
-    except Exception as e:
-        print("[Feishu] 发送失败：", e)
+    for attempt in range(FEISHU_MAX_RETRIES + 1):
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                return resp.status
+        except urllib.error.HTTPError as e:
+            if e.code not in FEISHU_RETRY_STATUS or attempt == FEISHU_MAX_RETRIES:
+                raise
+            print(f"[Feishu] HTTP {e.code}，稍后重试（{attempt + 1}/{FEISHU_MAX_RETRIES}）")
+        except urllib.error.URLError as e:
+            if not isinstance(e.reason, ConnectionRefusedError) or attempt == FEISHU_MAX_RETRIES:
+                raise
+            print(f"[Feishu] 连接被拒绝，稍后重试（{attempt + 1}/{FEISHU_MAX_RETRIES}）")
+        time.sleep(FEISHU_BACKOFF * 2 ** attempt)
+    raise RuntimeError("unreachable")
 
 
 # -----------------------
@@ -314,10 +663,15 @@ def git_commit_and_push(repo_root: Path, message: str) -> None:
         subprocess.check_call(cmd, cwd=str(repo_root))
 
     try:
-        run(["git", "config", "user.name", "actions-user"])
-        run(["git", "config", "user.email", "actions@github.com"])
+        # 产物无变化（同一数据重复运行的常见情况）时不做任何提交
+        status = subprocess.check_output(["git", "status", "--porcelain", "--", "results"], cwd=str(repo_root))
+        if not status.strip():
+            print("[Git] results/ 无变化，跳过提交。")
+            return
         run(["git", "add", "results"])
-        run(["git", "commit", "-m", message])
+        # 用 -c 临时指定提交者，省掉两次 git config 子进程，也不改写本地仓库配置
+        run(["git", "-c", "user.name=actions-user", "-c", "user.email=actions@github.com",
+             "commit", "-m", message])
         run(["git", "push"])
     except subprocess.CalledProcessError as e:
         print("[Git] 提交/推送失败（可能无变更或本地环境缺失 git 凭据）：", e)
@@ -340,24 +694,28 @@ def main():
     if not csv_paths:
         print("[Err] 未发现 CSV 数据。")
         sys.exit(1)
+    csvs = unique_by_content(csv_paths)
+    cache_dir = ensure_cache_dir(repo_root)
 
     frames = []
-    for p in csv_paths:
-        df = read_csv_any(p)
-        if df is None or df.empty:
+    for p, df in load_all(csvs, cache_dir):
+        if df is None:
             print(f"[Skip] 无法读取或空文件: {p}")
             continue
-        df = unify_dataframe(df)
         frames.append(df)
+    prune_cache(cache_dir, [d for _, d in csvs])
 
     if not frames:
         print("[Err] 无有效数据。")
         sys.exit(2)
 
     merged = pd.concat(frames, ignore_index=True)
+    # 转成 category：后续去重/分组在整数编码上进行，而不是逐行哈希 Python 字符串
+    for c in ("项目名", "基于哪条manifest分支"):
+        merged[c] = merged[c].astype("category")
     merged = deduplicate(merged)
     # 清掉没有时间戳的行（按需保留也可以，这里默认丢弃）
-    merged = merged[merged["申请时间"].notna()].copy()
+    merged = merged[merged["申请时间"].notna()]
 
     scoped, scope_str = filter_scope(merged, args.year)
     if scoped.empty:
@@ -369,15 +727,19 @@ def main():
     else:
         by_proj, by_pb, by_month = group_summaries(scoped)
 
-    files = save_outputs(results_dir, scope_str, by_proj, by_pb, by_month)
+    # Excel 的创建时间用范围内最新的申请时间；范围为空时退回全部数据的最新时间
+    latest = (merged if scoped.empty else scoped)["申请时间"].max()
+    created = None if pd.isna(latest) else latest.to_pydatetime()
+    files = save_outputs(results_dir, scope_str, by_proj, by_pb, by_month, created)
 
-    # 飞书通知（可选）
+    # 飞书通知、Git 提交（均可选）互不依赖，并行执行以重叠两次网络往返
     total_rows = int(merged.shape[0])
     proj_cnt = int(scoped["项目名"].nunique(dropna=True)) if not scoped.empty else 0
-    send_feishu_card(total_rows, proj_cnt, scope_str, files)
-
-    # Git 提交（可选）
-    git_commit_and_push(repo_root, f"chore: Yilian 年度统计产物（{scope_str}）")
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fut_card = ex.submit(send_feishu_card, total_rows, proj_cnt, scope_str, files)
+        fut_git = ex.submit(git_commit_and_push, repo_root, f"chore: Yilian 年度统计产物（{scope_str}）")
+        fut_card.result()
+        fut_git.result()
 
     print("[Done] OK.")
 